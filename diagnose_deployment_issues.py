@@ -3,116 +3,9 @@
 Comprehensive Deployment Diagnostic Tool
 """
 
-import requests
-import subprocess
-import sys
-import time
 from datetime import datetime
 
-RENDER_URL = "https://policy-2.onrender.com"
-
-def check_basic_connectivity():
-    """Check if the service is reachable at all"""
-    print("🔍 Step 1: Basic Connectivity Check")
-    print("-" * 40)
-    
-    try:
-        # Try with curl first
-        result = subprocess.run(
-            ["curl", "-I", RENDER_URL], 
-            capture_output=True, 
-            text=True, 
-            timeout=10
-        )
-        
-        if result.returncode == 0:
-            print("✅ Service responds to curl")
-            print(f"   Status: {result.stdout}")
-        else:
-            print("❌ Service doesn't respond to curl")
-            print(f"   Error: {result.stderr}")
-            
-    except Exception as e:
-        print(f"❌ Curl test failed: {e}")
-    
-    # Try with requests
-    try:
-        response = requests.get(f"{RENDER_URL}/health", timeout=5)
-        print(f"✅ Service responds to requests: {response.status_code}")
-        return True
-    except requests.exceptions.Timeout:
-        print("❌ Service timeout - service is down or very slow")
-        return False
-    except requests.exceptions.ConnectionError:
-        print("❌ Connection refused - service is completely down")
-        return False
-    except Exception as e:
-        print(f"❌ Request failed: {e}")
-        return False
-
-def check_dns_resolution():
-    """Check if DNS resolves correctly"""
-    print("\n🔍 Step 2: DNS Resolution Check")
-    print("-" * 40)
-    
-    try:
-        result = subprocess.run(
-            ["nslookup", "policy-2.onrender.com"], 
-            capture_output=True, 
-            text=True, 
-            timeout=10
-        )
-        
-        if result.returncode == 0:
-            print("✅ DNS resolution works")
-            print(f"   Response: {result.stdout}")
-        else:
-            print("❌ DNS resolution failed")
-            print(f"   Error: {result.stderr}")
-            
-    except Exception as e:
-        print(f"❌ DNS check failed: {e}")
-
-def check_port_scan():
-    """Check if port 443 is open"""
-    print("\n🔍 Step 3: Port Availability Check")
-    print("-" * 40)
-    
-    try:
-        result = subprocess.run(
-            ["telnet", "policy-2.onrender.com", "443"], 
-            capture_output=True, 
-            text=True, 
-            timeout=5
-        )
-        
-        if result.returncode == 0:
-            print("✅ Port 443 is open")
-        else:
-            print("❌ Port 443 is closed or filtered")
-            
-    except Exception as e:
-        print(f"❌ Port scan failed: {e}")
-
-def check_alternative_endpoints():
-    """Check if any endpoints respond"""
-    print("\n🔍 Step 4: Endpoint Response Check")
-    print("-" * 40)
-    
-    endpoints = [
-        "/health",
-        "/ping", 
-        "/",
-        "/docs",
-        "/openapi.json"
-    ]
-    
-    for endpoint in endpoints:
-        try:
-            response = requests.get(f"{RENDER_URL}{endpoint}", timeout=3)
-            print(f"✅ {endpoint}: {response.status_code}")
-        except Exception as e:
-            print(f"❌ {endpoint}: {type(e).__name__}")
+from diagnostics import RENDER_URL, render_report, run_sync
 
 def check_render_status():
     """Check Render service status via API"""
@@ -168,11 +61,10 @@ def main():
     print(f"🎯 Target: {RENDER_URL}")
     print("=" * 50)
     
-    # Run all checks
-    connectivity_ok = check_basic_connectivity()
-    check_dns_resolution()
-    check_port_scan()
-    check_alternative_endpoints()
+    # Run the automated checks concurrently, then the manual guidance
+    results = run_sync(["health", "dns", "port", "endpoints"])
+    render_report(results)
+    connectivity_ok = results["health"]["success"]
     check_render_status()
     generate_fix_recommendations()
     
@@ -0,0 +1,9 @@
+"""
+Shared deployment diagnostics used by the check_* and diagnose_* scripts
+"""
+
+from diagnostics._http import open_client
+from diagnostics.core import RENDER_URL, register, render_report, run, run_sync
+from diagnostics import checks  # noqa: F401  (registers the built-in checks)
+
+__all__ = ["RENDER_URL", "open_client", "register", "render_report", "run", "run_sync"]
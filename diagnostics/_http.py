@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the diagnostic scripts
+"""
+
+import httpx
+
+# The diagnostics want to see failures as they happen, so nothing is retried
+# (httpx transports don't retry by default)
+LIMITS = httpx.Limits(max_connections=16, max_keepalive_connections=16)
+
+def open_client():
+    """
+    One pooled HTTP/2 client for a whole diagnostic run.
+
+    Concurrent checks multiplex over the same connection to the service
+    instead of each paying its own TCP/TLS handshake. Create it inside the
+    running event loop (the runner does) and close it when the run ends.
+    """
+    return httpx.AsyncClient(http2=True, limits=LIMITS, timeout=10.0)
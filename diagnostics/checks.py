@@ -0,0 +1,274 @@
+"""
+Built-in checks against the deployed service.
+
+Each check takes the shared HTTP client and a text stream to write its report
+to, and returns True on success; the runner buffers the stream so checks can
+run concurrently.
+"""
+
+import asyncio
+import socket
+import time
+
+import httpx
+import orjson
+
+from diagnostics.core import RENDER_URL, register
+
+RENDER_HOST = "policy-2.onrender.com"
+
+# Endpoint URLs are fixed at import time rather than rebuilt on every call
+HEALTH_URL = RENDER_URL + "/health"
+DEBUG_URL = RENDER_URL + "/debug/pinecone"
+QUERY_URL = RENDER_URL + "/query-simple"
+ECHO_URL = RENDER_URL + "/hackrx/echo"
+DIAG_URL = RENDER_URL + "/hackrx/diagnose"
+HACKRX_URL = RENDER_URL + "/hackrx/run-simple"
+
+# Budgets for the slow hackrx endpoints: an unreachable service fails after
+# the connect budget instead of waiting out the whole read budget
+TIMEOUTS = httpx.Timeout(57.0, connect=3.0)
+
+PROBE_ENDPOINTS = ("/health", "/ping", "/", "/docs", "/openapi.json")
+PROBE_URLS = tuple(RENDER_URL + endpoint for endpoint in PROBE_ENDPOINTS)
+
+SAMPLE_QUESTION = "What is the grace period for premium payment?"
+
+# Request bodies never change, so serialize them once with orjson
+JSON_HEADERS = {"Content-Type": "application/json"}
+QUERY_BODY = orjson.dumps({"query": SAMPLE_QUESTION, "k": 1})
+ECHO_BODY = orjson.dumps({"test": True, "message": "Diagnostic test"})
+DOCUMENT_BODY = orjson.dumps({
+    "documents": "test_document.pdf",
+    "questions": [SAMPLE_QUESTION]
+})
+
+@register("health", "Health Check")
+async def check_health(client, out):
+    """Check if the service is reachable at all"""
+    print("🔍 Checking service health...", file=out)
+    
+    try:
+        response = await client.get(HEALTH_URL, timeout=5)
+        print(f"✅ Health check: {response.status_code}", file=out)
+        print(f"   Response: {response.text}", file=out)
+        return True
+    except httpx.TimeoutException:
+        print("❌ Service timeout - service is down or very slow", file=out)
+        return False
+    except httpx.ConnectError:
+        print("❌ Connection refused - service is completely down", file=out)
+        return False
+    except Exception as e:
+        print(f"❌ Request failed: {e}", file=out)
+        return False
+
+@register("env", "Environment Variables")
+async def check_environment_variables(client, out):
+    """Test if environment variables are set correctly"""
+    print("🔍 Testing environment variables...", file=out)
+    
+    # Test if embeddings are working (this will fail if env vars are missing)
+    try:
+        response = await client.get(DEBUG_URL, timeout=10)
+        print(f"✅ Debug pinecone: {response.status_code}", file=out)
+        if response.status_code == 200:
+            result = orjson.loads(response.content)
+            print(f"   Total vectors: {result.get('total_vectors', 0)}", file=out)
+            return True
+        else:
+            print(f"   Error: {response.text}", file=out)
+            return False
+    except Exception as e:
+        print(f"❌ Debug pinecone failed: {e}", file=out)
+        return False
+
+@register("query", "Simple Query")
+async def check_simple_query(client, out):
+    """Test if simple query works (tests LLM env vars)"""
+    print("🔍 Testing simple query...", file=out)
+    
+    try:
+        response = await client.post(
+            QUERY_URL,
+            content=QUERY_BODY,
+            headers=JSON_HEADERS,
+            timeout=30
+        )
+        print(f"✅ Query simple: {response.status_code}", file=out)
+        if response.status_code == 200:
+            result = orjson.loads(response.content)
+            print(f"   Found {result.get('count', 0)} results", file=out)
+            return True
+        else:
+            print(f"   Error: {response.text}", file=out)
+            return False
+    except httpx.TimeoutException:
+        print("❌ Query simple: Timeout after 30 seconds", file=out)
+        return False
+    except Exception as e:
+        print(f"❌ Query simple failed: {e}", file=out)
+        return False
+
+@register("echo", "Echo Endpoint")
+async def check_echo_endpoint(client, out):
+    """Test the echo endpoint"""
+    print("🔄 Testing echo endpoint...", file=out)
+    
+    try:
+        response = await client.post(
+            ECHO_URL,
+            content=ECHO_BODY,
+            headers=JSON_HEADERS,
+            timeout=10
+        )
+        print(f"✅ Echo endpoint: {response.status_code}", file=out)
+        if response.status_code == 200:
+            print(f"   Response: {response.text}", file=out)
+            return True
+        else:
+            print(f"   Error: {response.text}", file=out)
+            return False
+    except Exception as e:
+        print(f"❌ Echo endpoint failed: {e}", file=out)
+        return False
+
+@register("diagnose", "Diagnostic Endpoint")
+async def check_diagnostic_endpoint(client, out):
+    """Test the diagnostic endpoint"""
+    print("🔍 Testing diagnostic endpoint...", file=out)
+    
+    try:
+        response = await client.post(
+            DIAG_URL,
+            content=DOCUMENT_BODY,
+            headers=JSON_HEADERS,
+            timeout=TIMEOUTS  # Longer read budget for diagnostic
+        )
+        print(f"✅ Diagnostic endpoint: {response.status_code}", file=out)
+        
+        if response.status_code == 200:
+            result = orjson.loads(response.content)
+            print(f"   Status: {result.get('status')}", file=out)
+            print(f"   Message: {result.get('message')}", file=out)
+            
+            data = result.get('data', {})
+            if 'step' in data:
+                print(f"   Failed at step: {data['step']}", file=out)
+                if 'error' in data:
+                    print(f"   Error: {data['error']}", file=out)
+                if 'traceback' in data:
+                    print(f"   Traceback: {data['traceback']}", file=out)
+            elif 'search_time' in data:
+                print(f"   Search time: {data['search_time']:.2f}s", file=out)
+                print(f"   LLM time: {data['llm_time']:.2f}s", file=out)
+                print(f"   Total time: {data['total_time']:.2f}s", file=out)
+                print(f"   Results count: {data['results_count']}", file=out)
+            
+            return True
+        else:
+            print(f"❌ Diagnostic failed: {response.text}", file=out)
+            return False
+            
+    except httpx.ConnectTimeout:
+        print(f"❌ Could not connect within {TIMEOUTS.connect:.0f} seconds - service is unreachable", file=out)
+        return False
+    except httpx.ReadTimeout:
+        print(f"❌ Diagnostic connected but gave no response within {TIMEOUTS.read:.0f} seconds", file=out)
+        return False
+    except Exception as e:
+        print(f"❌ Diagnostic error: {e}", file=out)
+        return False
+
+@register("hackrx", "Hackrx Run Simple")
+async def check_hackrx_run_simple(client, out):
+    """Test the main endpoint with timing"""
+    print("🤖 Testing hackrx/run-simple with timing...", file=out)
+    
+    try:
+        start_ns = time.monotonic_ns()
+        response = await client.post(
+            HACKRX_URL,
+            content=DOCUMENT_BODY,
+            headers=JSON_HEADERS,
+            timeout=TIMEOUTS
+        )
+        elapsed_ns = time.monotonic_ns() - start_ns
+        
+        print(f"✅ Hackrx run simple: {response.status_code}", file=out)
+        print(f"   Response time: {elapsed_ns / 1e9:.2f}s", file=out)
+        
+        if response.status_code == 200:
+            result = orjson.loads(response.content)
+            print(f"   Status: {result.get('status')}", file=out)
+            print(f"   Message: {result.get('message')}", file=out)
+            print(f"   Data count: {len(result.get('data', []))}", file=out)
+            return True
+        elif response.status_code == 502:
+            print("❌ Still getting 502 Bad Gateway", file=out)
+            print("   This indicates the request is timing out on the server side", file=out)
+            return False
+        else:
+            print(f"❌ Unexpected status: {response.text}", file=out)
+            return False
+            
+    except httpx.ConnectTimeout:
+        print(f"❌ Could not connect within {TIMEOUTS.connect:.0f} seconds - service is unreachable", file=out)
+        return False
+    except httpx.ReadTimeout:
+        print(f"❌ Request connected but gave no response within {TIMEOUTS.read:.0f} seconds", file=out)
+        return False
+    except Exception as e:
+        print(f"❌ Error: {e}", file=out)
+        return False
+
+@register("dns", "DNS Resolution")
+async def check_dns_resolution(client, out):
+    """Check if DNS resolves correctly"""
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(RENDER_HOST, None, type=socket.SOCK_STREAM)
+        addresses = sorted({sockaddr[0] for _, _, _, _, sockaddr in infos})
+        print("✅ DNS resolution works", file=out)
+        print(f"   Addresses: {', '.join(addresses)}", file=out)
+        return True
+    except socket.gaierror as e:
+        print("❌ DNS resolution failed", file=out)
+        print(f"   Error: {e}", file=out)
+        return False
+
+@register("port", "Port Availability")
+async def check_port(client, out):
+    """Check if port 443 is open"""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(RENDER_HOST, 443), timeout=5)
+        writer.close()
+        await writer.wait_closed()
+        print("✅ Port 443 is open", file=out)
+        return True
+    except (OSError, asyncio.TimeoutError) as e:
+        print("❌ Port 443 is closed or filtered", file=out)
+        print(f"   Error: {e!r}", file=out)
+        return False
+
+async def _probe_one(client, url):
+    """Probe a single endpoint, returning (ok, status or exception name)"""
+    try:
+        response = await client.get(url, timeout=3)
+        return True, response.status_code
+    except Exception as e:
+        return False, type(e).__name__
+
+@register("endpoints", "Endpoint Response")
+async def check_alternative_endpoints(client, out):
+    """Check if any endpoints respond"""
+    # Probe all endpoints at once so a dead service costs one timeout, not five
+    results = await asyncio.gather(*(_probe_one(client, url) for url in PROBE_URLS))
+    
+    # gather keeps the original order, so the output is stable
+    for endpoint, (ok, detail) in zip(PROBE_ENDPOINTS, results):
+        if ok:
+            print(f"✅ {endpoint}: {detail}", file=out)
+        else:
+            print(f"❌ {endpoint}: {detail}", file=out)
+    
+    return any(ok for ok, _ in results)
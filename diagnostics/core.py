@@ -0,0 +1,93 @@
+"""
+Check registry and runner for the deployment diagnostics
+"""
+
+import asyncio
+import time
+from io import StringIO
+
+from diagnostics._http import open_client
+
+RENDER_URL = "https://policy-2.onrender.com"
+
+# name -> (title, async check function taking (client, out))
+CHECKS = {}
+
+def register(name, title):
+    """Register a check under a short name used by the scripts to select it"""
+    def decorator(func):
+        CHECKS[name] = (title, func)
+        return func
+    return decorator
+
+def _format_elapsed(elapsed_ns):
+    """Format a monotonic nanosecond duration for the report"""
+    return f"{elapsed_ns / 1e9:.2f}s"
+
+async def _run_one(client, name):
+    """Run one check on the shared client with its output buffered"""
+    title, func = CHECKS[name]
+    out = StringIO()
+    start_ns = time.monotonic_ns()
+    try:
+        success = await func(client, out)
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}", file=out)
+        success = False
+    elapsed_ns = time.monotonic_ns() - start_ns
+    
+    # Print the whole block at once so concurrent checks don't interleave
+    print(f"\n📋 {title}")
+    print("-" * 30)
+    print(out.getvalue(), end="")
+    if success:
+        print(f"✅ {title} PASSED ({_format_elapsed(elapsed_ns)})")
+    else:
+        print(f"❌ {title} FAILED ({_format_elapsed(elapsed_ns)})")
+    
+    return {
+        "title": title,
+        "success": success,
+        "elapsed_ns": elapsed_ns
+    }
+
+async def run(names, gate=None):
+    """
+    Run the named checks concurrently over one pooled HTTP/2 client.
+    
+    If a gate check is given it runs first, and the remaining checks are only
+    attempted when it passes. Results are returned in the requested order.
+    """
+    results = {}
+    
+    async with open_client() as client:
+        if gate:
+            results[gate] = await _run_one(client, gate)
+            if not results[gate]["success"]:
+                for name in names:
+                    results[name] = {"title": CHECKS[name][0], "success": False, "elapsed_ns": 0}
+                return results
+        
+        outcomes = await asyncio.gather(*(_run_one(client, name) for name in names))
+    results.update(zip(names, outcomes))
+    return results
+
+def run_sync(names, gate=None):
+    """Blocking entry point for the scripts"""
+    return asyncio.run(run(names, gate=gate))
+
+def render_report(results, heading="📊 DIAGNOSTIC ANALYSIS"):
+    """Print the PASS/FAIL table and return True if every check passed"""
+    print("\n" + "=" * 50)
+    print(heading)
+    print("=" * 50)
+    
+    passed = sum(1 for result in results.values() if result["success"])
+    total = len(results)
+    
+    for result in results.values():
+        status = "✅ PASS" if result["success"] else "❌ FAIL"
+        print(f"{status} {result['title']} ({_format_elapsed(result['elapsed_ns'])})")
+    
+    print(f"\n🎯 {passed}/{total} tests passed")
+    return passed == total
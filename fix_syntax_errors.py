@@ -6,7 +6,7 @@ Fix all syntax errors in server/main.py
 def fix_hackrx_run_simple():
     """Fix the hackrx_run_simple function"""
     return '''
-@app.post("/hackrx/run-simple")
+@app.post("/hackrx/run-simple", response_class=ORJSONResponse)
 async def hackrx_run_simple(
     request: dict
 ):
@@ -26,13 +26,15 @@ async def hackrx_run_simple(
                 "data": []
             }
         
-        # Limit number of questions to prevent timeout
-        if len(questions) > 2:  # Process only 2 questions for speed
-            questions = questions[:2]
-            print(f"⚠️  Limited to first 2 questions to prevent timeout")
+        # Same cap as /hackrx/run, so one request can't fan out unbounded LLM calls
+        if len(questions) > WEBHOOK_CONFIG["max_questions"]:
+            return {
+                "status": "error",
+                "message": f"Too many questions (max {WEBHOOK_CONFIG['max_questions']})",
+                "data": []
+            }
         
-        # Get embeddings manager
-        from utils.embeddings_utils import get_embeddings_manager, call_llm
+        # Get embeddings manager (imported at module top, not per request)
         embeddings_manager = get_embeddings_manager()
         
         if embeddings_manager.embeddings is None:
@@ -42,62 +44,64 @@ async def hackrx_run_simple(
                 "data": []
             }
         
-        # Process all questions with optimized approach
-        results = []
+        print(f"Processing {len(questions)} questions...")
+        
+        # Embed every question in one batched call, then look each one up
+        # (blocking, so run in a worker thread)
+        all_search_results = await asyncio.to_thread(
+            embeddings_manager.search_similar_batch,
+            questions,
+            "test_user",
+            1  # Only 1 result for maximum speed
+        )
         
-        for i, question in enumerate(questions):
+        async def answer_question(i, question, search_results):
+            """Answer one question; the LLM calls for all questions overlap"""
             try:
-                print(f"Processing question {i+1}/{len(questions)}: {question[:50]}...")
-                
-                # Search for similar documents (synchronous, ultra-fast)
-                search_results = embeddings_manager.search_similar(
-                    query=question,
-                    user_id="test_user",
-                    k=1  # Only 1 result for maximum speed
-                )
-                
                 if not search_results:
-                    results.append({
+                    return {
                         "question": question,
                         "answer": "No relevant information found in the documents.",
                         "sources": []
-                    })
-                    continue
+                    }
                 
-                # Extract context from search results
-                context_chunks = []
-                similarity_scores = []
-                sources = []
+                # Extract context from search results in one pass
+                context_chunks, similarity_scores, sources = map(list, zip(*(
+                    (result.get("content", ""), result.get("score", 0), result.get("metadata", {}).get("filename", "Unknown"))
+                    for result in search_results
+                )))
                 
-                for result in search_results:
-                    context_chunks.append(result.get("content", ""))
-                    similarity_scores.append(result.get("score", 0))
-                    sources.append(result.get("metadata", {}).get("filename", "Unknown"))
+                # Generate answer using the async LLM client; the shared semaphore
+                # bounds concurrent OpenRouter calls across all requests
+                async with LLM_SEMAPHORE:
+                    answer = await acall_llm(question, context_chunks, similarity_scores)
                 
-                # Generate answer using LLM (synchronous)
-                answer = call_llm(question, context_chunks, similarity_scores)
-                
-                results.append({
+                print(f"✅ Completed question {i+1}")
+                return {
                     "question": question,
                     "answer": answer,
                     "sources": sources
-                })
-                
-                print(f"✅ Completed question {i+1}")
+                }
                 
             except Exception as e:
                 print(f"❌ Error processing question {i+1}: {e}")
-                results.append({
+                return {
                     "question": question,
                     "answer": f"Error processing question: {str(e)}",
                     "sources": []
-                })
+                }
         
-        return {
+        # Questions are independent, so answer them concurrently (LLM_SEMAPHORE caps the fan-out)
+        results = await asyncio.gather(
+            *(answer_question(i, question, search_results)
+              for i, (question, search_results) in enumerate(zip(questions, all_search_results)))
+        )
+        
+        return ORJSONResponse({
             "status": "success",
             "message": f"Processed {len(results)} questions",
             "data": results
-        }
+        })
         
     except Exception as e:
         print(f"❌ Fatal error in hackrx/run-simple: {e}")
@@ -126,9 +130,10 @@ async def upload_file_simple_v2(
         safe_filename = f"upload_{timestamp}{file_extension}"
         file_path = os.path.join(UPLOADS_DIR, safe_filename)
         
-        # Save file to disk
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Save file to disk without blocking the event loop, 1 MiB at a time
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while chunk := await file.read(1024 * 1024):
+                await buffer.write(chunk)
         
         # Try to generate embeddings (optional)
         try:
@@ -195,6 +200,8 @@ if __name__ == "__main__":
     print("✅ Fixed upload_simple_v2 function")
     print()
     print("📋 Copy these functions to replace the problematic ones in server/main.py")
+    print("   (they rely on asyncio, aiofiles, ORJSONResponse, WEBHOOK_CONFIG, LLM_SEMAPHORE,")
+    print("    get_embeddings_manager and acall_llm being defined or imported at module top)")
     print()
     print("🎯 Next steps:")
     print("1. Replace the functions in server/main.py")
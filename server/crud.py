@@ -1,56 +1,111 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, raiseload, selectinload
 from models import User, UploadedFile
 from schemas import UserCreate
 from typing import Optional, List
-from firebase_auth import get_user_info_from_token
-
-def get_user_by_firebase_uid(db: Session, firebase_uid: str) -> Optional[User]:
-    """Get user by Firebase UID"""
-    return db.query(User).filter(User.firebase_uid == firebase_uid).first()
-
-def create_user(db: Session, user_data: UserCreate) -> User:
-    """Create a new user"""
-    db_user = User(**user_data.dict())
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+from cachetools import TTLCache
+
+# firebase_uid -> User.id; ids rather than ORM objects so nothing detached is shared across sessions
+_user_id_cache = TTLCache(maxsize=10000, ttl=60)
+
+async def get_user_by_firebase_uid(db: AsyncSession, firebase_uid: str, load_files: bool = False) -> Optional[User]:
+    """Get user by Firebase UID, optionally with their uploaded files in one extra query"""
+    options = [selectinload(User.uploaded_files)] if load_files else []
+    
+    # Recently seen UID: primary-key lookup, served from the identity map when possible
+    user_id = _user_id_cache.get(firebase_uid)
+    if user_id is not None:
+        user = await db.get(User, user_id, options=options)
+        if user:
+            return user
+        _user_id_cache.pop(firebase_uid, None)
+    
+    result = await db.execute(select(User).filter_by(firebase_uid=firebase_uid).options(*options))
+    user = result.scalar_one_or_none()
+    if user:
+        _user_id_cache[firebase_uid] = user.id
+    return user
+
+async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
+    """Create a new user (INSERT ... RETURNING, so no follow-up SELECT)"""
+    result = await db.execute(
+        insert(User)
+        .values(
+            firebase_uid=user_data.firebase_uid,
+            email=user_data.email,
+            display_name=user_data.display_name
+        )
+        .returning(User)
+    )
+    db_user = result.scalar_one()
+    await db.commit()
+    _user_id_cache[db_user.firebase_uid] = db_user.id
     return db_user
 
-def get_or_create_user(db: Session, firebase_uid: str, email: str, display_name: Optional[str] = None) -> User:
+async def create_users(db: AsyncSession, users_data: List[UserCreate]) -> List[User]:
+    """Create several users in one batched INSERT"""
+    result = await db.scalars(insert(User).returning(User), [user_data.model_dump() for user_data in users_data])
+    db_users = list(result.all())
+    await db.commit()
+    for db_user in db_users:
+        _user_id_cache[db_user.firebase_uid] = db_user.id
+    return db_users
+
+async def get_or_create_user(db: AsyncSession, firebase_uid: str, email: str, display_name: Optional[str] = None) -> User:
     """Get existing user or create new one if doesn't exist"""
-    user = get_user_by_firebase_uid(db, firebase_uid)
+    user = await get_user_by_firebase_uid(db, firebase_uid)
     if user:
         return user
-    
+
     # Create new user
     user_data = UserCreate(
         firebase_uid=firebase_uid,
         email=email,
         display_name=display_name
     )
-    return create_user(db, user_data)
-
-def create_uploaded_file(db: Session, user_id: int, filename: str, file_type: str, file_path: str) -> UploadedFile:
-    """Create a new uploaded file record"""
-    db_file = UploadedFile(
-        user_id=user_id,
-        filename=filename,
-        file_type=file_type,
-        file_path=file_path
+    return await create_user(db, user_data)
+
+async def create_uploaded_file(db: AsyncSession, user_id: int, filename: str, file_type: str, file_path: str) -> UploadedFile:
+    """Create a new uploaded file record (INSERT ... RETURNING)"""
+    result = await db.execute(
+        insert(UploadedFile)
+        .values(
+            user_id=user_id,
+            filename=filename,
+            file_type=file_type,
+            file_path=file_path
+        )
+        .returning(UploadedFile)
     )
-    db.add(db_file)
-    db.commit()
-    db.refresh(db_file)
+    db_file = result.scalar_one()
+    await db.commit()
     return db_file
 
-def get_user_files(db: Session, user_id: int) -> List[UploadedFile]:
-    """Get all files uploaded by a user"""
-    return db.query(UploadedFile).filter(UploadedFile.user_id == user_id).all()
+async def get_user_files(db: AsyncSession, user_id: int, strict: bool = False, summary_only: bool = False) -> List[UploadedFile]:
+    """
+    Get all files uploaded by a user.
+    
+    strict: any relationship not eager-loaded here raises.
+    summary_only: load just id/filename/file_type so the planner can answer from the index
+    (and skip the users query; .user isn't loaded).
+    """
+    stmt = select(UploadedFile).filter(UploadedFile.user_id == user_id)
+    if summary_only:
+        stmt = stmt.options(load_only(UploadedFile.id, UploadedFile.user_id, UploadedFile.filename, UploadedFile.file_type))
+    else:
+        stmt = stmt.options(selectinload(UploadedFile.user))
+    if strict or db.info.get("strict_loading"):
+        stmt = stmt.options(raiseload("*"))
+    result = await db.execute(stmt)
+    return list(result.scalars().all())
 
-def get_file_by_id(db: Session, file_id: int) -> Optional[UploadedFile]:
+async def get_file_by_id(db: AsyncSession, file_id: int) -> Optional[UploadedFile]:
     """Get a specific file by ID"""
-    return db.query(UploadedFile).filter(UploadedFile.id == file_id).first()
+    result = await db.execute(select(UploadedFile).filter(UploadedFile.id == file_id))
+    return result.scalar_one_or_none()
 
-def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
     """Get user by database ID"""
-    return db.query(User).filter(User.id == user_id).first() 
\ No newline at end of file
+    result = await db.execute(select(User).filter(User.id == user_id))
+    return result.scalar_one_or_none()
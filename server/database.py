@@ -1,6 +1,8 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 import os
 from dotenv import load_dotenv
 
@@ -8,28 +10,74 @@ load_dotenv()
 
 # Database URL - you'll need to set this in your .env file
 DATABASE_URL = os.getenv(
-    "DATABASE_URL", 
+    "DATABASE_URL",
     "sqlite:///./test.db"  # Fallback to SQLite for development
 )
 
+def _async_url(url):
+    """
+    Point a database URL at its asyncio driver (asyncpg / aiosqlite).
+
+    Returns the URL and any connect_args the driver needs for it.
+    """
+    url = make_url(url)
+    if url.drivername in ("postgresql", "postgres"):
+        # asyncpg rejects libpq's sslmode query parameter (Render URLs carry
+        # ?sslmode=require) but takes the same mode names as ssl=...
+        sslmode = url.query.get("sslmode")
+        url = url.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+        return url, ({"ssl": sslmode} if sslmode else {})
+    if url.drivername == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite"), {}
+    return url, {}
+
+def _create_engines(url):
+    """Create the sync engine (table creation only) and the async engine requests use"""
+    async_url, connect_args = _async_url(url)
+    if url.startswith("sqlite"):
+        sync_url = url
+        sync_args = {"connect_args": {"check_same_thread": False}}
+        pool_args = {}
+        if async_url.database in (None, "", ":memory:"):
+            # An in-memory database only exists on its one connection
+            sync_args["poolclass"] = StaticPool
+            pool_args["poolclass"] = StaticPool
+        # Otherwise aiosqlite's default pool gives each session its own
+        # connection, so one request's commit/rollback can't touch another's writes
+    else:
+        # Keep warm connections around so requests don't pay a handshake each time
+        pool_args = {
+            "pool_size": 25,
+            "max_overflow": 25,
+            "pool_pre_ping": True,
+            "pool_recycle": 1800,
+            "pool_use_lifo": True
+        }
+        sync_url = url.replace("postgres://", "postgresql://", 1)
+        sync_args = {}
+    if connect_args:
+        pool_args["connect_args"] = connect_args
+    return create_engine(sync_url, **sync_args), create_async_engine(async_url, **pool_args)
+
 # Try to create engine, fallback to SQLite if PostgreSQL not available
 try:
-    engine = create_engine(DATABASE_URL)
+    engine, async_engine = _create_engines(DATABASE_URL)
     print("Database engine created successfully")
 except Exception as e:
     print(f"PostgreSQL connection failed: {e}")
     print("   Falling back to SQLite for development")
     # Use SQLite as fallback
-    engine = create_engine("sqlite:///./test.db")
+    engine, async_engine = _create_engines("sqlite:///./test.db")
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
+# Set DB_STRICT_LOADING=true in tests/CI to turn accidental lazy loads into errors
+DB_STRICT_LOADING = os.getenv("DB_STRICT_LOADING", "false").lower() == "true"
+
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
+        db.info["strict_loading"] = DB_STRICT_LOADING
         yield db
-    finally:
-        db.close() 
\ No newline at end of file
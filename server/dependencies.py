@@ -0,0 +1,22 @@
+from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud import get_user_by_firebase_uid
+from database import get_db
+from firebase_auth import get_firebase_uid
+from models import User
+
+async def get_current_user(
+    firebase_uid: str = Depends(get_firebase_uid),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """
+    The authenticated user, or 404 if they have no account yet.
+    
+    crud caches firebase_uid -> user id, so repeat requests are a primary-key
+    get (often straight from the session's identity map) instead of a filtered query.
+    """
+    user = await get_user_by_firebase_uid(db, firebase_uid)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
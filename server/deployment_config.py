@@ -4,7 +4,8 @@ Deployment configuration for HackRx webhook integration
 """
 
 import os
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Tuple
 
 # Webhook Configuration
 WEBHOOK_CONFIG = {
@@ -30,24 +31,36 @@ ERROR_FORMAT = {
     "detail": "Questions array is required"
 }
 
+# CORS: comma-separated CORS_ORIGINS lists the known frontends; unset keeps allow-all.
+# Credentials are only allowed for an explicit origin list: browsers reject a wildcard
+# with credentials, and the frontend authenticates with bearer headers, not cookies.
+# max_age lets browsers cache a preflight for a day instead of repeating it per request.
+_CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()]
+CORS_CONFIG = {
+    "allow_origins": _CORS_ORIGINS,
+    "allow_credentials": "*" not in _CORS_ORIGINS,
+    "max_age": 86400
+}
+
 # Required Environment Variables
-REQUIRED_ENV_VARS = [
+REQUIRED_ENV_VARS = (
     "OPENROUTER_API_KEY",
-    "PINECONE_API_KEY", 
+    "PINECONE_API_KEY",
     "PINECONE_INDEX_NAME",
     "FIREBASE_PROJECT_ID",
     "FIREBASE_PRIVATE_KEY_ID",
     "FIREBASE_PRIVATE_KEY",
     "FIREBASE_CLIENT_EMAIL",
     "FIREBASE_CLIENT_ID"
-]
+)
 
 # Optional Environment Variables
-OPTIONAL_ENV_VARS = [
+OPTIONAL_ENV_VARS = (
     "OPENAI_API_KEY",  # For OpenAI embeddings fallback
     "DATABASE_URL",    # For PostgreSQL database
-    "HACKRX_TOKEN"     # For webhook authentication
-]
+    "HACKRX_TOKEN",    # For webhook authentication
+    "CORS_ORIGINS"     # Allowed frontend origins (comma-separated)
+)
 
 def validate_deployment_config() -> Dict[str, Any]:
     """
@@ -56,24 +69,20 @@ def validate_deployment_config() -> Dict[str, Any]:
     Returns:
         Dict with validation results
     """
+    env = os.environ
+    # Only which variables are set matters, so that snapshot is the cache key
+    missing_vars, optional_vars = _unset_env_vars(
+        tuple(bool(env.get(var)) for var in REQUIRED_ENV_VARS),
+        tuple(bool(env.get(var)) for var in OPTIONAL_ENV_VARS)
+    )
+    # Built per call from the cached tuples, so callers may modify their copy
     validation_result = {
-        "ready_for_deployment": True,
-        "missing_vars": [],
-        "optional_vars": [],
+        "ready_for_deployment": not missing_vars,
+        "missing_vars": list(missing_vars),
+        "optional_vars": list(optional_vars),
         "recommendations": []
     }
     
-    # Check required environment variables
-    for var in REQUIRED_ENV_VARS:
-        if not os.getenv(var):
-            validation_result["missing_vars"].append(var)
-            validation_result["ready_for_deployment"] = False
-    
-    # Check optional environment variables
-    for var in OPTIONAL_ENV_VARS:
-        if not os.getenv(var):
-            validation_result["optional_vars"].append(var)
-    
     # Add recommendations
     if not validation_result["ready_for_deployment"]:
         validation_result["recommendations"].append(
@@ -87,6 +96,13 @@ def validate_deployment_config() -> Dict[str, Any]:
     
     return validation_result
 
+@lru_cache(maxsize=1)
+def _unset_env_vars(required_set: tuple, optional_set: tuple) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Names of the unset required and optional variables (immutable, so safe to share)"""
+    missing_vars = tuple(var for var, is_set in zip(REQUIRED_ENV_VARS, required_set) if not is_set)
+    optional_vars = tuple(var for var, is_set in zip(OPTIONAL_ENV_VARS, optional_set) if not is_set)
+    return missing_vars, optional_vars
+
 def get_webhook_url(domain: str) -> str:
     """
     Generate the webhook URL for the given domain
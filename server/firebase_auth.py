@@ -2,25 +2,61 @@ import firebase_admin
 from firebase_admin import credentials, auth
 from fastapi import HTTPException, Depends, Header
 from typing import Optional
+from functools import lru_cache
+from cachetools import TTLCache
+import asyncio
+import hashlib
+import logging
+import threading
+import time
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Initialize Firebase Admin SDK
 # You'll need to set FIREBASE_SERVICE_ACCOUNT_KEY_PATH in your .env file
 # or use the default Firebase credentials
-try:
-    service_account_path = os.getenv("FIREBASE_SERVICE_ACCOUNT_KEY_PATH")
-    if service_account_path and os.path.exists(service_account_path):
-        cred = credentials.Certificate(service_account_path)
-        firebase_admin.initialize_app(cred)
-    else:
+_firebase_app_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _firebase_app():
+    """Initialize Firebase on first token verification instead of at import"""
+    with _firebase_app_lock:
+        if firebase_admin._apps:
+            return firebase_admin.get_app()
+        service_account_path = os.getenv("FIREBASE_SERVICE_ACCOUNT_KEY_PATH")
+        if service_account_path and os.path.exists(service_account_path):
+            cred = credentials.Certificate(service_account_path)
+            return firebase_admin.initialize_app(cred)
         # Use default credentials (for development)
-        firebase_admin.initialize_app()
-except ValueError:
-    # App already initialized
-    pass
+        return firebase_admin.initialize_app()
+
+def _verify_id_token(token: str) -> dict:
+    return auth.verify_id_token(token, app=_firebase_app())
+
+# Verified tokens, keyed by a digest of the token so raw tokens aren't kept in memory
+_token_cache = TTLCache(maxsize=4096, ttl=300)
+_token_cache_lock = threading.Lock()
+
+async def verify_token_cached(token: str) -> dict:
+    """
+    Verify a Firebase ID token, reusing the decoded result for repeat calls
+    until the cache TTL or the token's own expiry, whichever comes first.
+    Verification itself is blocking, so cache misses run it in a worker thread.
+    """
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    with _token_cache_lock:
+        decoded_token = _token_cache.get(key)
+    if decoded_token is not None and decoded_token.get('exp', 0) > time.time():
+        return decoded_token
+    
+    decoded_token = await asyncio.to_thread(_verify_id_token, token)
+    with _token_cache_lock:
+        _token_cache[key] = decoded_token
+    return decoded_token
 
 async def get_firebase_uid(authorization: Optional[str] = Header(None)) -> str:
     """
@@ -29,43 +65,43 @@ async def get_firebase_uid(authorization: Optional[str] = Header(None)) -> str:
     """
     if not authorization:
         # For testing purposes, return a default UID
-        print("No authorization header provided, using test UID")
+        logger.debug("No authorization header provided, using test UID")
         return "test_user_123"
     
     try:
         # Extract token from "Bearer <token>" format
         scheme, token = authorization.split()
         if scheme.lower() != "bearer":
-            print("Invalid authorization scheme, using test UID")
+            logger.debug("Invalid authorization scheme, using test UID")
             return "test_user_123"
         
         # For testing, if token is "test" or invalid, use test UID
         if token == "test" or len(token) < 10:
-            print("Test token detected, using test UID")
+            logger.debug("Test token detected, using test UID")
             return "test_user_123"
         
         # Try to verify the Firebase ID token
         try:
-            decoded_token = auth.verify_id_token(token)
+            decoded_token = await verify_token_cached(token)
             firebase_uid = decoded_token['uid']
             return firebase_uid
         except (auth.InvalidIdTokenError, ValueError):
             # For testing purposes, return test UID instead of failing
-            print("Invalid Firebase token, using test UID")
+            logger.debug("Invalid Firebase token, using test UID")
             return "test_user_123"
         
     except Exception as e:
         # For testing purposes, return test UID instead of failing
-        print(f"Authentication error: {e}, using test UID")
+        logger.debug("Authentication error: %s, using test UID", e)
         return "test_user_123"
 
-def get_user_info_from_token(token: str) -> dict:
+async def get_user_info_from_token(token: str) -> dict:
     """
     Extract user information from Firebase ID token.
     Returns a dictionary with uid, email, and display_name.
     """
     try:
-        decoded_token = auth.verify_id_token(token)
+        decoded_token = await verify_token_cached(token)
         return {
             'uid': decoded_token['uid'],
             'email': decoded_token.get('email', ''),
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Logging setup for the API
+
+Request handlers only put records on an in-memory queue; a background
+listener thread does the formatting and the (possibly blocking) write to
+stderr, so a slow log pipe never stalls the event loop.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener = None
+
+def setup_logging() -> None:
+    """Route the root logger through a QueueHandler (safe to call more than once)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
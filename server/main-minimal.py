@@ -1,27 +1,56 @@
 from fastapi import FastAPI, HTTPException, Request, Body
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import List
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, StringConstraints, conlist
+from typing import Annotated, List, Union
+from contextlib import asynccontextmanager
+import asyncio
+from collections import Counter
+import hashlib
+import hmac
 import os
+import time
 import logging
-from datetime import datetime
-import json
+import tempfile
 import httpx
+import orjson
+from cachetools import LRUCache
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="Policy Analysis API", version="1.0.0")
+# Log through a background queue so handlers never block on the log pipe
+from logging_config import setup_logging
+setup_logging()
 
-# CORS middleware - allow all origins for deployment
+from deployment_config import CORS_CONFIG, WEBHOOK_CONFIG
+
+@asynccontextmanager
+async def lifespan(app):
+    # One pooled client for the whole app so document downloads reuse
+    # keep-alive connections instead of a fresh TCP/TLS handshake per request
+    app.state.http = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=httpx.Timeout(30.0, connect=5.0),  # Unreachable hosts fail fast; slow bodies still get 30s
+        follow_redirects=True,
+        http2=True
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+
+app = FastAPI(title="Policy Analysis API", version="1.0.0", default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# CORS middleware - origins from CORS_ORIGINS (all, without credentials, by default), preflights cached for a day
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins for deployment
-    allow_credentials=True,
+    allow_origins=CORS_CONFIG["allow_origins"],
+    allow_credentials=CORS_CONFIG["allow_credentials"],
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=CORS_CONFIG["max_age"],
 )
 
 # Create uploads directory if it doesn't exist
@@ -29,18 +58,173 @@ UPLOADS_DIR = "uploads"
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 
 HACKRX_TOKEN = os.getenv("HACKRX_TOKEN", "my_hackrx_token")  # Get from environment
+# Precomputed once; bytes so compare_digest also accepts non-ASCII headers
+_EXPECTED_AUTH = f"Bearer {HACKRX_TOKEN}".encode()
+
+# Oversized payloads are rejected during validation, before any work is done
+DocumentUrl = Annotated[str, StringConstraints(max_length=2048)]
 
 class HackrxRunRequest(BaseModel):
-    documents: str
-    questions: List[str]
+    documents: Union[DocumentUrl, List[DocumentUrl]]
+    questions: conlist(str, max_length=WEBHOOK_CONFIG["max_questions"])
+
+# Bound in-flight document downloads to the client's keep-alive pool size
+DOWNLOAD_SEMAPHORE = asyncio.Semaphore(20)
+
+# Downloaded documents are kept here, one file per download, and owned by the cache below
+DOCUMENTS_DIR = os.path.join(UPLOADS_DIR, "documents")
+os.makedirs(DOCUMENTS_DIR, exist_ok=True)
+DOCUMENT_TTL_SECONDS = 600
+
+# path -> requests currently using the file; a file dropped from the cache
+# while in use is only deleted once the last of them releases it
+_document_readers = Counter()
+_discarded_documents = set()
+
+def discard_document(path):
+    """Delete a document file now, or as soon as no request is using it"""
+    if _document_readers[path]:
+        _discarded_documents.add(path)
+        return
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def release_pdf(path):
+    """Hand back a path from download_pdf once the request is done with the file"""
+    _document_readers[path] -= 1
+    if _document_readers[path] <= 0:
+        del _document_readers[path]
+        if path in _discarded_documents:
+            _discarded_documents.discard(path)
+            discard_document(path)
+
+class DocumentCache(LRUCache):
+    """url -> (etag, path, fetched_at); evicting an entry discards its file"""
+    def popitem(self):
+        url, (etag, path, fetched_at) = super().popitem()
+        discard_document(path)
+        return url, (etag, path, fetched_at)
+
+_document_cache = DocumentCache(maxsize=64)
+# url -> download task, so concurrent requests for the same document share one download
+_inflight_downloads = {}
+
+def _remove_partial(pdf_file):
+    """Close and delete a download that didn't complete"""
+    pdf_file.close()
+    os.unlink(pdf_file.name)
+
+async def _fetch_pdf(client: httpx.AsyncClient, url: str) -> str:
+    """Stream one document to disk instead of buffering it in memory, returning its path"""
+    cached = _document_cache.get(url)
+    headers = {"If-None-Match": cached[0]} if cached and cached[0] else {}
+    async with DOWNLOAD_SEMAPHORE:
+        async with client.stream("GET", url, headers=headers) as response:
+            # Unchanged since the last download: keep the copy we have
+            if response.status_code == 304 and cached:
+                _document_cache[url] = (cached[0], cached[1], time.monotonic())
+                return cached[1]
+            if response.status_code != 200:
+                raise Exception(f"Failed to download PDF: {response.status_code}")
+            # A new file per download, so requests still reading the previous
+            # copy of this URL keep a consistent file until they release it.
+            # All file I/O goes through worker threads to keep disk stalls off the event loop
+            pdf_file = await asyncio.to_thread(
+                tempfile.NamedTemporaryFile,
+                dir=DOCUMENTS_DIR, prefix=hashlib.sha256(url.encode()).hexdigest() + "-", suffix=".pdf", delete=False
+            )
+            try:
+                async for chunk in response.aiter_bytes(65536):
+                    await asyncio.to_thread(pdf_file.write, chunk)
+                await asyncio.to_thread(pdf_file.close)
+            except BaseException:
+                # Also on cancellation, so an aborted download doesn't leave a partial file
+                await asyncio.shield(asyncio.to_thread(_remove_partial, pdf_file))
+                raise
+            etag = response.headers.get("ETag")
+    # Replacing an entry doesn't go through popitem, so retire the old copy here
+    replaced = _document_cache.get(url)
+    _document_cache[url] = (etag, pdf_file.name, time.monotonic())
+    if replaced:
+        discard_document(replaced[1])
+    return pdf_file.name
+
+async def download_pdf(client: httpx.AsyncClient, url: str) -> str:
+    """
+    Return a local copy of the document, reusing recent and in-flight downloads.
+
+    The file stays on disk until the caller passes the path to release_pdf.
+    """
+    while True:
+        cached = _document_cache.get(url)
+        if cached and time.monotonic() - cached[2] < DOCUMENT_TTL_SECONDS:
+            path = cached[1]
+        else:
+            task = _inflight_downloads.get(url)
+            if task is None:
+                task = asyncio.ensure_future(_fetch_pdf(client, url))
+                _inflight_downloads[url] = task
+                task.add_done_callback(lambda _: _inflight_downloads.pop(url, None))
+            # Shielded so one cancelled request doesn't abort the download for the others
+            path = await asyncio.shield(task)
+        
+        _document_readers[path] += 1
+        if os.path.exists(path):
+            return path
+        # Evicted and deleted before this request could claim it: download again
+        release_pdf(path)
+        if _document_cache.get(url, (None, None, None))[1] == path:
+            del _document_cache[url]
+
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+# Cap concurrent LLM calls per process so a 20-question request doesn't trip rate limits
+LLM_SEMAPHORE = asyncio.Semaphore(8)
+
+async def answer_question(client: httpx.AsyncClient, question: str) -> str:
+    """Ask the LLM one question over the shared pooled client"""
+    if not OPENROUTER_API_KEY:
+        # No model configured: keep the placeholder answer
+        return f"Answer to: {question}"
+    
+    payload = {
+        "model": "mistralai/mistral-7b-instruct",
+        "messages": [
+            {"role": "system", "content": "You are an expert insurance policy analyst. Answer concisely."},
+            {"role": "user", "content": question}
+        ],
+        "temperature": 0.3,
+        "max_tokens": 500
+    }
+    async with LLM_SEMAPHORE:
+        try:
+            response = await client.post(
+                OPENROUTER_URL,
+                content=orjson.dumps(payload),
+                headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}", "Content-Type": "application/json"}
+            )
+        except httpx.HTTPError as e:
+            return f"Unable to generate answer: {e}"
+    
+    if response.status_code != 200:
+        return f"Unable to generate answer: API error ({response.status_code})"
+    choices = orjson.loads(response.content).get("choices") or []
+    if not choices:
+        return "Unable to generate answer: Unexpected response format."
+    return choices[0]["message"]["content"]
 
 @app.get("/")
 async def root():
     return {"message": "Policy Analysis API is running!"}
 
+# Liveness probes hit this every few seconds, so the payload is built once
+_HEALTH_OK = {"status": "healthy"}
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return _HEALTH_OK
 
 @app.post("/hackrx/run")
 async def hackrx_run(
@@ -49,27 +233,43 @@ async def hackrx_run(
 ):
     # Validate Authorization header
     auth_header = request.headers.get("Authorization")
-    if auth_header != f"Bearer {HACKRX_TOKEN}":
+    if not auth_header or not hmac.compare_digest(auth_header.encode(), _EXPECTED_AUTH):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    # Download the PDF
+    # Download every document concurrently; one bad URL doesn't fail the batch
+    documents = [body.documents] if isinstance(body.documents, str) else body.documents
+    results = await asyncio.gather(
+        *(download_pdf(request.app.state.http, url) for url in documents),
+        return_exceptions=True
+    )
+    pdf_paths = [result for result in results if not isinstance(result, BaseException)]
+    download_errors = [
+        f"{url}: {result}" for url, result in zip(documents, results)
+        if isinstance(result, BaseException)
+    ]
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(body.documents)
-            if response.status_code != 200:
-                raise Exception(f"Failed to download PDF: {response.status_code}")
-            pdf_bytes = response.content
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"PDF download failed: {e}")
+        if not pdf_paths:
+            raise HTTPException(status_code=400, detail=f"PDF download failed: {'; '.join(download_errors)}")
 
-    # For now, just return a simple response
-    # In a full implementation, you would process the PDF and answer questions
-    return {
+        # Questions are independent, so ask them all at once (gather keeps input order)
+        # In a full implementation, the PDFs at pdf_paths would supply each question's context
+        answers = await asyncio.gather(
+            *(answer_question(request.app.state.http, question) for question in body.questions)
+        )
+    finally:
+        for path in pdf_paths:
+            release_pdf(path)
+    
+    result = {
         "status": "success",
-        "message": "PDF downloaded successfully",
+        "message": "PDF downloaded successfully" if not download_errors
+                   else f"Downloaded {len(pdf_paths)} of {len(documents)} PDFs",
         "questions": body.questions,
-        "answers": [f"Answer to: {q}" for q in body.questions]
+        "answers": answers
     }
+    if download_errors:
+        result["download_errors"] = download_errors
+    return result
 
 @app.post("/hackrx/run-simple")
 async def hackrx_run_simple(
@@ -82,5 +282,14 @@ async def hackrx_run_simple(
     }
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",  # uvloop has no Windows build
+        http="httptools",
+        timeout_keep_alive=30,
+        backlog=2048
+    ) 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -17,6 +17,10 @@ class User(Base):
 
 class UploadedFile(Base):
     __tablename__ = "uploaded_files"
+    __table_args__ = (
+        # Covers "files for this user" lookups without touching the heap for ids
+        Index("ix_files_user_id_id", "user_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -26,4 +30,5 @@ class UploadedFile(Base):
     file_path = Column(Text, nullable=False)
     
     # Relationship to user
+    # Lazy by default: queries that need it ask for selectinload explicitly (see crud)
     user = relationship("User", back_populates="uploaded_files") 
\ No newline at end of file
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+PDF text extraction with PyMuPDF
+
+Kept apart from main.py so the extraction processes only import this module
+and fitz, not the app, torch and the embedding model.
+"""
+
+import fitz
+
+def open_pdf(source):
+    """Open a PDF from its bytes or from a file path"""
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+def page_count(source):
+    """Number of pages in the PDF"""
+    with open_pdf(source) as doc:
+        return doc.page_count
+
+def extract_pdf_text(source, start=0, stop=None):
+    """Text of pages [start, stop), collected and joined once (CPU-bound and holds the GIL)"""
+    with open_pdf(source) as doc:
+        return "\n".join([doc[n].get_text("text") for n in range(start, doc.page_count if stop is None else stop)])
@@ -1,23 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any
+import asyncio
 import os
 from pathlib import Path
 
 from database import get_db
 from models import UploadedFile, User
 from firebase_auth import get_firebase_uid
+from crud import get_user_by_firebase_uid
+from dependencies import get_current_user
 from utils.embeddings_utils import get_embeddings_manager
 from schemas import EmbeddingsResponse, EmbeddingsStatus
 
 router = APIRouter(prefix="/embeddings", tags=["embeddings"])
 
+async def _get_user_file(db: AsyncSession, user: User, file_id: int) -> UploadedFile:
+    """Look up one of the user's uploaded files, raising 404 if it is missing."""
+    # Get the uploaded file
+    result = await db.execute(select(UploadedFile).filter(
+        UploadedFile.id == file_id,
+        UploadedFile.user_id == user.id
+    ))
+    uploaded_file = result.scalars().first()
+    
+    if not uploaded_file:
+        raise HTTPException(status_code=404, detail="File not found or access denied")
+    
+    return uploaded_file
+
 @router.post("/generate-embeddings", response_model=EmbeddingsResponse)
 async def generate_embeddings(
     file_id: int,
     background_tasks: BackgroundTasks,
-    firebase_uid: str = Depends(get_firebase_uid),
-    db: Session = Depends(get_db)
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Generate embeddings for an uploaded file.
@@ -25,26 +43,14 @@ async def generate_embeddings(
     Args:
         file_id: ID of the uploaded file to process
         background_tasks: FastAPI background tasks
-        firebase_uid: User's Firebase UID (from auth)
+        user: The authenticated user
         db: Database session
         
     Returns:
         EmbeddingsResponse with processing status
     """
     try:
-        # Get the user
-        user = db.query(User).filter(User.firebase_uid == firebase_uid).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Get the uploaded file
-        uploaded_file = db.query(UploadedFile).filter(
-            UploadedFile.id == file_id,
-            UploadedFile.user_id == user.id
-        ).first()
-        
-        if not uploaded_file:
-            raise HTTPException(status_code=404, detail="File not found or access denied")
+        uploaded_file = await _get_user_file(db, user, file_id)
         
         # Check if file exists
         file_path = Path(uploaded_file.file_path)
@@ -66,7 +72,7 @@ async def generate_embeddings(
         background_tasks.add_task(
             process_embeddings_background,
             str(file_path),
-            firebase_uid,
+            user.firebase_uid,
             file_id,
             db
         )
@@ -88,7 +94,7 @@ async def process_embeddings_background(
     file_path: str,
     user_id: str,
     file_id: int,
-    db: Session
+    db: AsyncSession
 ):
     """
     Background task to process embeddings.
@@ -104,8 +110,8 @@ async def process_embeddings_background(
         embeddings_manager = get_embeddings_manager()
         
         # Get user info for metadata
-        user = db.query(User).filter(User.firebase_uid == user_id).first()
-        uploaded_file = db.query(UploadedFile).filter(UploadedFile.id == file_id).first()
+        user = await get_user_by_firebase_uid(db, user_id)
+        uploaded_file = await db.get(UploadedFile, file_id)
         
         if not user or not uploaded_file:
             print(f"❌ User or file not found for embeddings processing")
@@ -130,34 +136,22 @@ async def process_embeddings_background(
 @router.get("/status/{file_id}", response_model=EmbeddingsResponse)
 async def get_embeddings_status(
     file_id: int,
-    firebase_uid: str = Depends(get_firebase_uid),
-    db: Session = Depends(get_db)
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get the status of embeddings generation for a file.
     
     Args:
         file_id: ID of the uploaded file
-        firebase_uid: User's Firebase UID (from auth)
+        user: The authenticated user
         db: Database session
         
     Returns:
         EmbeddingsResponse with current status
     """
     try:
-        # Get the user
-        user = db.query(User).filter(User.firebase_uid == firebase_uid).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Get the uploaded file
-        uploaded_file = db.query(UploadedFile).filter(
-            UploadedFile.id == file_id,
-            UploadedFile.user_id == user.id
-        ).first()
-        
-        if not uploaded_file:
-            raise HTTPException(status_code=404, detail="File not found or access denied")
+        await _get_user_file(db, user, file_id)
         
         # For now, we'll return a simple status
         # In a real implementation, you might want to track processing status in the database
@@ -179,7 +173,7 @@ async def search_embeddings(
     query: str,
     k: int = 5,
     firebase_uid: str = Depends(get_firebase_uid),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Search through user's embedded documents.
@@ -194,20 +188,22 @@ async def search_embeddings(
         Dictionary with search results
     """
     try:
-        # Get embeddings manager
-        embeddings_manager = get_embeddings_manager()
-        
-        # Search for similar documents
-        results = embeddings_manager.search_similar(query, firebase_uid, k)
-        
-        # Format results
-        formatted_results = []
-        for doc in results:
-            formatted_results.append({
-                "content": doc.page_content,
-                "metadata": doc.metadata,
-                "score": getattr(doc, 'score', None)
-            })
+        # Get embeddings manager (the first call builds it, which does network I/O)
+        embeddings_manager = await asyncio.to_thread(get_embeddings_manager)
+        
+        # Search for similar documents; embedding the query and querying Pinecone block,
+        # so run them off the event loop
+        results = await asyncio.to_thread(embeddings_manager.search_similar, query, firebase_uid, k)
+        
+        # Format results; search_similar returns plain dicts, not LangChain Documents
+        formatted_results = [
+            {
+                "content": result.get("content", ""),
+                "metadata": result.get("metadata", {}),
+                "score": result.get("score")
+            }
+            for result in results
+        ]
         
         return {
             "success": True,
@@ -7,8 +7,9 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 sys.path.insert(0, current_dir)
 
-# Import FastAPI app
-from main import app
+# Import FastAPI app (not in PDF extraction workers, which re-import this script as __mp_main__)
+if __name__ != "__mp_main__":
+    from main import app
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,17 +1,26 @@
 import os
 import asyncio
 from typing import List, Optional
+from functools import lru_cache
 from pathlib import Path
 import logging
 import uuid
 from datetime import datetime
 import httpx
+import numpy as np
+import orjson
+from openai import APIStatusError, AsyncOpenAI
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
+from langchain_community.document_loaders import PyMuPDFLoader
 from langchain.schema import Document
-import pinecone
+# Talk to Pinecone over gRPC when pinecone[grpc] is installed: HTTP/2 and
+# protobuf framing cost less per query than the default REST/JSON client
+try:
+    from pinecone.grpc import PineconeGRPC as Pinecone
+except ImportError:
+    from pinecone import Pinecone
 
 # Try to import additional loaders, but don't fail if not available
 try:
@@ -20,32 +29,21 @@ try:
 except ImportError:
     HAS_UNSTRUCTURED = False
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Handlers and levels are set by the app (logging_config.setup_logging), not at import
 logger = logging.getLogger(__name__)
 
-def call_llm(question: str, context_chunks: List[str], similarity_scores: List[float]) -> str:
-    """
-    Call OpenRouter API with Mistral to generate final answer
-    
-    Args:
-        question: The user's question
-        context_chunks: List of relevant document chunks
-        similarity_scores: List of similarity scores for each chunk
-    
-    Returns:
-        str: The LLM-generated answer
-    """
-    # Check if we have any relevant chunks - be very permissive
-    if not context_chunks or all(score < 0.001 for score in similarity_scores):
-        return "No relevant information found in the document."
-    
-    # Get OpenRouter API key
-    openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
-    if not openrouter_api_key:
-        print("⚠️  OPENROUTER_API_KEY not found in environment variables")
-        return "Unable to generate answer: OpenRouter API key not configured."
-    
+# Upserts go out in 100-vector requests, several in flight at once
+PINECONE_UPSERT_BATCH = 100
+PINECONE_POOL_THREADS = 8
+
+# Dimension of the policy-documents index; every stored and query vector is padded to it
+PINECONE_DIMENSION = 1024
+# Query vector for metadata-only lookups: the right dimension, and non-zero so any metric
+# accepts it. Only the filter matters; ranking against it is arbitrary but cheap
+METADATA_QUERY_VECTOR = [1.0] + [0.0] * (PINECONE_DIMENSION - 1)
+
+def _llm_payload(question: str, context_chunks: List[str], similarity_scores: List[float]) -> dict:
+    """Build the OpenRouter chat-completion request body shared by call_llm and acall_llm"""
     # Format context chunks with similarity scores
     context_text = ""
     for i, (chunk, score) in enumerate(zip(context_chunks, similarity_scores)):
@@ -101,6 +99,41 @@ def call_llm(question: str, context_chunks: List[str], similarity_scores: List[f
         "temperature": 0.3,
         "max_tokens": 500
     }
+    return payload
+
+@lru_cache(maxsize=1)
+def _openrouter_http_client() -> httpx.Client:
+    """Shared sync HTTP client for call_llm, so repeat calls skip the TLS handshake"""
+    return httpx.Client(timeout=30.0)
+
+@lru_cache(maxsize=1)
+def _async_openrouter_client() -> AsyncOpenAI:
+    """Shared async OpenRouter client, so concurrent calls reuse one connection pool"""
+    return AsyncOpenAI(base_url="https://openrouter.ai/api/v1", api_key=os.getenv("OPENROUTER_API_KEY"))
+
+def call_llm(question: str, context_chunks: List[str], similarity_scores: List[float]) -> str:
+    """
+    Call OpenRouter API with Mistral to generate final answer
+    
+    Args:
+        question: The user's question
+        context_chunks: List of relevant document chunks
+        similarity_scores: List of similarity scores for each chunk
+    
+    Returns:
+        str: The LLM-generated answer
+    """
+    # Check if we have any relevant chunks - be very permissive
+    if not context_chunks or all(score < 0.001 for score in similarity_scores):
+        return "No relevant information found in the document."
+    
+    # Get OpenRouter API key
+    openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
+    if not openrouter_api_key:
+        print("⚠️  OPENROUTER_API_KEY not found in environment variables")
+        return "Unable to generate answer: OpenRouter API key not configured."
+    
+    payload = _llm_payload(question, context_chunks, similarity_scores)
     
     headers = {
         "Authorization": f"Bearer {openrouter_api_key}",
@@ -108,31 +141,69 @@ def call_llm(question: str, context_chunks: List[str], similarity_scores: List[f
     }
     
     try:
-        # Use synchronous httpx for this function
-        with httpx.Client(timeout=30.0) as client:
-            response = client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                json=payload,
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if "choices" in result and len(result["choices"]) > 0:
-                    answer = result["choices"][0]["message"]["content"]
-                    print(f"✅ LLM generated answer: {answer[:100]}...")
-                    return answer
-                else:
-                    print(f"⚠️  Unexpected response format: {result}")
-                    return "Unable to generate answer: Unexpected response format."
+        # Use synchronous httpx for this function, over the shared pooled client
+        response = _openrouter_http_client().post(
+            "https://openrouter.ai/api/v1/chat/completions",
+            content=orjson.dumps(payload),
+            headers=headers
+        )
+        
+        if response.status_code == 200:
+            result = orjson.loads(response.content)
+            if "choices" in result and len(result["choices"]) > 0:
+                answer = result["choices"][0]["message"]["content"]
+                print(f"✅ LLM generated answer: {answer[:100]}...")
+                return answer
             else:
-                print(f"⚠️  API error ({response.status_code}): {response.text}")
-                return f"Unable to generate answer: API error ({response.status_code})"
+                print(f"⚠️  Unexpected response format: {result}")
+                return "Unable to generate answer: Unexpected response format."
+        else:
+            print(f"⚠️  API error ({response.status_code}): {response.text}")
+            return f"Unable to generate answer: API error ({response.status_code})"
                 
     except Exception as e:
         print(f"❌ Error calling LLM: {str(e)}")
         return f"Unable to generate answer: {str(e)}"
 
+async def acall_llm(question: str, context_chunks: List[str], similarity_scores: List[float]) -> str:
+    """
+    Async version of call_llm, so several questions can be answered concurrently
+    (e.g. with asyncio.gather) without tying up a worker thread each
+    
+    Args:
+        question: The user's question
+        context_chunks: List of relevant document chunks
+        similarity_scores: List of similarity scores for each chunk
+    
+    Returns:
+        str: The LLM-generated answer
+    """
+    # Check if we have any relevant chunks - be very permissive
+    if not context_chunks or all(score < 0.001 for score in similarity_scores):
+        return "No relevant information found in the document."
+    
+    if not os.getenv("OPENROUTER_API_KEY"):
+        logger.warning("OPENROUTER_API_KEY not found in environment variables")
+        return "Unable to generate answer: OpenRouter API key not configured."
+    
+    payload = _llm_payload(question, context_chunks, similarity_scores)
+    
+    try:
+        response = await _async_openrouter_client().chat.completions.create(**payload, timeout=30.0)
+        if response.choices:
+            answer = response.choices[0].message.content
+            logger.debug("LLM generated answer: %.100s", answer)
+            return answer
+        logger.warning("Unexpected LLM response format: %s", response)
+        return "Unable to generate answer: Unexpected response format."
+    
+    except APIStatusError as e:
+        logger.warning("LLM API error (%s): %s", e.status_code, e.message)
+        return f"Unable to generate answer: API error ({e.status_code})"
+    except Exception as e:
+        logger.warning("Error calling LLM: %s", e)
+        return f"Unable to generate answer: {str(e)}"
+
 class EmbeddingsManager:
     def __init__(self, pinecone_api_key: Optional[str] = None, pinecone_environment: Optional[str] = None):
         """
@@ -222,8 +293,6 @@ class EmbeddingsManager:
     def _initialize_pinecone(self):
         """Initialize Pinecone client and index."""
         try:
-            from pinecone import Pinecone
-            
             # Initialize Pinecone client
             self.pinecone_client = Pinecone(api_key=self.pinecone_api_key)
             
@@ -235,7 +304,7 @@ class EmbeddingsManager:
                 logger.warning(f"Index {index_name} not found. Please create it manually in Pinecone console.")
                 self.pinecone_index = None
             else:
-                self.pinecone_index = self.pinecone_client.Index(index_name)
+                self.pinecone_index = self.pinecone_client.Index(index_name, pool_threads=PINECONE_POOL_THREADS)
                 logger.info(f"Connected to Pinecone index: {index_name}")
             
         except Exception as e:
@@ -261,7 +330,8 @@ class EmbeddingsManager:
         
         try:
             if file_extension == '.pdf':
-                loader = PyPDFLoader(str(file_path))
+                # PyMuPDF is C-backed and extracts text several times faster than pypdf
+                loader = PyMuPDFLoader(str(file_path))
                 documents = loader.load()
                 logger.info(f"Loaded PDF document: {file_path}")
                 
@@ -331,10 +401,11 @@ class EmbeddingsManager:
         """
         try:
             # Load document
-            documents = self.load_document(file_path)
+            # Loading, splitting, embedding and upserting all block, so each runs in a worker thread
+            documents = await asyncio.to_thread(self.load_document, file_path)
             
             # Split into chunks
-            chunks = self.split_documents(documents)
+            chunks = await asyncio.to_thread(self.split_documents, documents)
             
             if not self.pinecone_index:
                 return {
@@ -351,58 +422,33 @@ class EmbeddingsManager:
                     "error": "Embeddings not initialized"
                 }
             
-            # Generate embeddings and prepare for Pinecone
-            vectors_to_upsert = []
+            # Generate all chunk embeddings in one batched call, padded to the index dimension
+            embeddings = await asyncio.to_thread(self._embed_texts, [chunk.page_content for chunk in chunks])
+            logger.info(f"✅ Final embedding dimension: {embeddings.shape[1]}")
             
-            for i, chunk in enumerate(chunks):
-                # Generate embedding
-                if hasattr(self.embeddings, 'embed_query'):
-                    # OpenAI or HuggingFace embeddings (both use embed_query)
-                    embedding = self.embeddings.embed_query(chunk.page_content)
-                else:
-                    # Fallback for sentence-transformers
-                    embedding = self.embeddings.encode(chunk.page_content).tolist()
-                
-                # Pad embeddings to match Pinecone index dimension (1024)
-                original_dim = len(embedding)
-                if original_dim == 1536:  # OpenAI embeddings
-                    logger.info(f"Padding OpenAI embeddings from 1536 to 1024 dimensions...")
-                    # Take first 1024 dimensions from OpenAI embeddings
-                    embedding = embedding[:1024]
-                elif original_dim == 384:  # HuggingFace embeddings
-                    logger.info(f"Padding HuggingFace embeddings from 384 to 1024 dimensions...")
-                    # Pad with zeros to reach 1024 dimensions
-                    embedding = embedding + [0.0] * (1024 - original_dim)
-                elif original_dim != 1024:
-                    logger.info(f"Padding embeddings from {original_dim} to 1024 dimensions...")
-                    # Pad with zeros to reach 1024 dimensions
-                    embedding = embedding + [0.0] * (1024 - original_dim)
-                
-                logger.info(f"✅ Final embedding dimension: {len(embedding)}")
-                
-                # Create unique ID for the vector
-                vector_id = f"{user_id}_{filename}_{i}_{uuid.uuid4().hex[:8]}"
-                
-                # Prepare metadata
-                metadata = {
-                    "user_id": user_id,
-                    "filename": filename,
-                    "user_email": user_email,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks),
-                    "upload_date": datetime.now().isoformat(),
-                    "content": chunk.page_content[:500],  # First 500 chars for preview
-                    "source_file": file_path
+            # Prepare vectors for Pinecone. Metadata holds only fields that filters,
+            # search results or get_user_documents read, since every query match sends it back
+            upload_date = datetime.now().isoformat()
+            total_chunks = len(chunks)
+            vectors_to_upsert = [
+                {
+                    "id": f"{user_id}_{filename}_{i}_{uuid.uuid4().hex[:8]}",
+                    "values": values,
+                    "metadata": {
+                        "user_id": user_id,
+                        "filename": filename,
+                        "user_email": user_email,
+                        "chunk_index": i,
+                        "total_chunks": total_chunks,
+                        "upload_date": upload_date,
+                        "content": chunk.page_content[:500]  # First 500 chars for preview
+                    }
                 }
-                
-                vectors_to_upsert.append({
-                    "id": vector_id,
-                    "values": embedding,
-                    "metadata": metadata
-                })
+                for i, (chunk, values) in enumerate(zip(chunks, embeddings.tolist()))
+            ]
             
-            # Upsert to Pinecone
-            self.pinecone_index.upsert(vectors=vectors_to_upsert)
+            # Upsert to Pinecone in 100-vector batches, sent in parallel
+            await asyncio.to_thread(self._upsert_batches, vectors_to_upsert)
             
             logger.info(f"Stored {len(chunks)} embeddings in Pinecone for user {user_id}")
             
@@ -451,52 +497,126 @@ class EmbeddingsManager:
             else:
                 query_embedding = self.embeddings.encode(query).tolist()
             
-            # Pad query embedding to match Pinecone index dimension (1024)
-            original_dim = len(query_embedding)
-            if original_dim == 1536:  # OpenAI embeddings
-                query_embedding = query_embedding[:1024]
-            elif original_dim == 384:  # HuggingFace embeddings
-                query_embedding = query_embedding + [0.0] * (1024 - original_dim)
-            elif original_dim != 1024:
-                query_embedding = query_embedding + [0.0] * (1024 - original_dim)
+            return self._query_index(self._pad_embedding(query_embedding), user_id, k, document_filter)
             
-            # Build filter based on user_id and document_filter
-            filter_dict = {}
-            if user_id and user_id.strip():
-                filter_dict["user_id"] = user_id
-            if document_filter:
-                filter_dict["filename"] = document_filter
+        except Exception as e:
+            logger.error(f"Error searching similar documents: {e}")
+            return []
+    
+    def search_similar_batch(self, queries: List[str], user_id: str, k: int = 5, document_filter: str = None) -> List[List[dict]]:
+        """
+        Search for similar documents for several queries at once.
+        
+        All queries are embedded in a single batched call; Pinecone has no
+        multi-vector query, so the index lookups are still one per query.
+        
+        Args:
+            queries: Search queries
+            user_id: User identifier to filter results
+            k: Number of results to return per query
+            document_filter: Optional document filename to filter results
             
-            # Search in Pinecone with metadata filter
-            if filter_dict:
-                results = self.pinecone_index.query(
-                    vector=query_embedding,
-                    top_k=k,
-                    include_metadata=True,
-                    filter=filter_dict
-                )
-            else:
-                # No filter for debugging
-                results = self.pinecone_index.query(
-                    vector=query_embedding,
-                    top_k=k,
-                    include_metadata=True
-                )
+        Returns:
+            One list of search results per query, in the same order
+        """
+        try:
+            if not self.pinecone_index:
+                logger.error("Pinecone index not available")
+                return [[] for _ in queries]
             
-            # Format results
-            formatted_results = []
-            for match in results.matches:
-                formatted_results.append({
-                    "content": match.metadata.get("content", ""),
-                    "metadata": match.metadata,
-                    "score": match.score
-                })
+            if self.embeddings is None:
+                logger.error("Embeddings not available")
+                return [[] for _ in queries]
             
-            return formatted_results
+            # Generate all query embeddings in one request
+            return [
+                self._query_index(embedding.tolist(), user_id, k, document_filter)
+                for embedding in self._embed_texts(list(queries))
+            ]
             
         except Exception as e:
             logger.error(f"Error searching similar documents: {e}")
-            return []
+            return [[] for _ in queries]
+    
+    def _embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in one batched call, padded and normalized for the Pinecone index."""
+        if hasattr(self.embeddings, 'embed_documents'):
+            # OpenAI or HuggingFace embeddings
+            embeddings = self.embeddings.embed_documents(texts)
+        else:
+            # Fallback for sentence-transformers
+            embeddings = self.embeddings.encode(texts, batch_size=64)
+        return self._pad_embeddings(embeddings)
+    
+    def _upsert_batches(self, vectors: List[dict]) -> None:
+        """Send PINECONE_UPSERT_BATCH-sized upserts in parallel and wait for all of them."""
+        pending = [
+            self.pinecone_index.upsert(vectors=vectors[i:i + PINECONE_UPSERT_BATCH], async_req=True)
+            for i in range(0, len(vectors), PINECONE_UPSERT_BATCH)
+        ]
+        for result in pending:
+            # gRPC upserts return futures, REST ones ApplyResults
+            if hasattr(result, "result"):
+                result.result()
+            else:
+                result.get()
+    
+    def _pad_embeddings(self, embeddings) -> np.ndarray:
+        """
+        Pad or truncate a batch of embeddings to match Pinecone index dimension (1024),
+        then L2-normalize them.
+        
+        OpenAI embeddings (1536) are truncated, HuggingFace ones (384) zero-padded;
+        either way it is one float32 array copy rather than per-vector list work.
+        Normalizing only rescales each vector, so cosine rankings are unchanged.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        padded = np.zeros((len(embeddings), PINECONE_DIMENSION), dtype=np.float32)
+        if embeddings.size:
+            width = min(embeddings.shape[1], PINECONE_DIMENSION)
+            padded[:, :width] = embeddings[:, :width]
+            padded /= np.linalg.norm(padded, axis=1, keepdims=True) + 1e-12
+        return padded
+    
+    def _pad_embedding(self, embedding: List[float]) -> List[float]:
+        """Pad or truncate (and L2-normalize) a single embedding for the Pinecone index."""
+        return self._pad_embeddings([embedding])[0].tolist()
+    
+    def _query_index(self, query_embedding: List[float], user_id: str, k: int, document_filter: str = None) -> List[dict]:
+        """Run one Pinecone query and format the matches."""
+        # Build filter based on user_id and document_filter
+        filter_dict = {}
+        if user_id and user_id.strip():
+            filter_dict["user_id"] = user_id
+        if document_filter:
+            filter_dict["filename"] = document_filter
+        
+        # Search in Pinecone with metadata filter
+        if filter_dict:
+            results = self.pinecone_index.query(
+                vector=query_embedding,
+                top_k=k,
+                include_metadata=True,
+                filter=filter_dict
+            )
+        else:
+            # No filter for debugging
+            results = self.pinecone_index.query(
+                vector=query_embedding,
+                top_k=k,
+                include_metadata=True
+            )
+        
+        # Format results
+        formatted_results = []
+        for match in results.matches:
+            formatted_results.append({
+                "content": match.metadata.get("content", ""),
+                "metadata": match.metadata,
+                "score": match.score
+            })
+        
+        return formatted_results
     
     def get_user_documents(self, user_id: str) -> List[dict]:
         """
@@ -515,7 +635,7 @@ class EmbeddingsManager:
             
             # Query Pinecone for user's documents
             results = self.pinecone_index.query(
-                vector=[0] * 1536,  # Dummy vector for metadata-only query
+                vector=METADATA_QUERY_VECTOR,  # Metadata-only query; values aren't sent back
                 top_k=1000,
                 include_metadata=True,
                 filter={"user_id": user_id}
@@ -545,19 +665,12 @@ class EmbeddingsManager:
             logger.error(f"Error getting user documents: {e}")
             return []
 
-# Global embeddings manager instance
-embeddings_manager = None
-
+@lru_cache(maxsize=1)
 def get_embeddings_manager() -> EmbeddingsManager:
     """Get or create the global embeddings manager instance."""
-    global embeddings_manager
-    
-    if embeddings_manager is None:
-        pinecone_api_key = os.getenv("PINECONE_API_KEY")
-        pinecone_environment = os.getenv("PINECONE_ENVIRONMENT")
-        embeddings_manager = EmbeddingsManager(
-            pinecone_api_key=pinecone_api_key,
-            pinecone_environment=pinecone_environment
-        )
-    
-    return embeddings_manager
\ No newline at end of file
+    pinecone_api_key = os.getenv("PINECONE_API_KEY")
+    pinecone_environment = os.getenv("PINECONE_ENVIRONMENT")
+    return EmbeddingsManager(
+        pinecone_api_key=pinecone_api_key,
+        pinecone_environment=pinecone_environment
+    )
\ No newline at end of file
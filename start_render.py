@@ -1,17 +1,27 @@
 #!/usr/bin/env python3
 """
-Simple startup script for Render deployment
+Simple startup script for Render and Docker deployments
 """
 
+import importlib.util
 import os
 import sys
+from pathlib import Path
 
-# Add server directory to path
-server_dir = os.path.join(os.path.dirname(__file__), 'server')
-sys.path.insert(0, server_dir)
+# server/main.py imports its siblings (schemas, models, ...) as top-level
+# modules, so the server directory has to be importable
+SERVER_DIR = Path(__file__).resolve().parent / "server"
+sys.path.insert(0, str(SERVER_DIR))
 
-# Import the FastAPI app
-from server.main import app
+# Load the FastAPI app straight from its file so the result doesn't depend on
+# the working directory or on which "main" module is found first on sys.path.
+# PDF extraction workers re-import this script as __mp_main__ and skip it
+if __name__ != "__mp_main__":
+    _spec = importlib.util.spec_from_file_location("server_main", SERVER_DIR / "main.py")
+    _server_main = importlib.util.module_from_spec(_spec)
+    sys.modules["server_main"] = _server_main
+    _spec.loader.exec_module(_server_main)
+    app = _server_main.app
 
 if __name__ == "__main__":
     import uvicorn
@@ -21,14 +31,17 @@ if __name__ == "__main__":
     
     print(f"🚀 Starting server on port {port}")
     print(f"📁 Working directory: {os.getcwd()}")
-    print(f"🐍 Python path: {sys.path[:3]}...")
+    print(f"📦 Server directory: {SERVER_DIR}")
     
     # Start the server
     uvicorn.run(
         app,
         host="0.0.0.0",
         port=port,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",  # uvloop has no Windows build
+        http="httptools",
         timeout_keep_alive=30,
+        backlog=2048,
         timeout_graceful_shutdown=10,
         log_level="info"
-    ) 
\ No newline at end of file
+    )
@@ -4,57 +4,60 @@ Deployment Verification Script
 Tests the complete workflow after deployment
 """
 
-import requests
-import json
-import time
+import httpx
+
+from diagnostics import register, render_report, run_sync
 
 # Configuration
 RENDER_URL = "https://policy-2.onrender.com"  # Update with your actual URL
 
-def test_basic_endpoints():
+@register("verify_basic", "Basic Endpoints")
+async def test_basic_endpoints(client, out):
     """Test basic server functionality"""
-    print("🔍 Testing Basic Endpoints...")
+    print("🔍 Testing Basic Endpoints...", file=out)
     
     # Test health
     try:
-        response = requests.get(f"{RENDER_URL}/health", timeout=10)
-        print(f"✅ Health: {response.status_code}")
+        response = await client.get(f"{RENDER_URL}/health", timeout=10)
+        print(f"✅ Health: {response.status_code}", file=out)
     except Exception as e:
-        print(f"❌ Health failed: {e}")
+        print(f"❌ Health failed: {e}", file=out)
         return False
     
     # Test ping
     try:
-        response = requests.get(f"{RENDER_URL}/ping", timeout=10)
-        print(f"✅ Ping: {response.status_code}")
+        response = await client.get(f"{RENDER_URL}/ping", timeout=10)
+        print(f"✅ Ping: {response.status_code}", file=out)
     except Exception as e:
-        print(f"❌ Ping failed: {e}")
+        print(f"❌ Ping failed: {e}", file=out)
         return False
     
     return True
 
-def test_hackrx_test():
+@register("verify_hackrx_test", "Hackrx Test")
+async def test_hackrx_test(client, out):
     """Test the simple test endpoint"""
-    print("\n🤖 Testing /hackrx/test...")
+    print("🤖 Testing /hackrx/test...", file=out)
     
     try:
-        response = requests.post(
+        response = await client.post(
             f"{RENDER_URL}/hackrx/test",
             json={"test": True},
             headers={"Content-Type": "application/json"},
             timeout=10
         )
-        print(f"✅ Test endpoint: {response.status_code}")
+        print(f"✅ Test endpoint: {response.status_code}", file=out)
         if response.status_code == 200:
-            print(f"   Response: {response.json()}")
+            print(f"   Response: {response.json()}", file=out)
         return True
     except Exception as e:
-        print(f"❌ Test endpoint failed: {e}")
+        print(f"❌ Test endpoint failed: {e}", file=out)
         return False
 
-def test_query_simple():
+@register("verify_query_simple", "Query Simple")
+async def test_query_simple(client, out):
     """Test simple query functionality"""
-    print("\n🔍 Testing /query-simple...")
+    print("🔍 Testing /query-simple...", file=out)
     
     test_data = {
         "query": "What is the grace period for premium payment?",
@@ -62,27 +65,28 @@ def test_query_simple():
     }
     
     try:
-        response = requests.post(
+        response = await client.post(
             f"{RENDER_URL}/query-simple",
             json=test_data,
             headers={"Content-Type": "application/json"},
             timeout=30
         )
-        print(f"✅ Query simple: {response.status_code}")
+        print(f"✅ Query simple: {response.status_code}", file=out)
         if response.status_code == 200:
             result = response.json()
-            print(f"   Found {result.get('count', 0)} results")
+            print(f"   Found {result.get('count', 0)} results", file=out)
         return True
-    except requests.exceptions.Timeout:
-        print("❌ Query simple: Timeout after 30 seconds")
+    except httpx.TimeoutException:
+        print("❌ Query simple: Timeout after 30 seconds", file=out)
         return False
     except Exception as e:
-        print(f"❌ Query simple failed: {e}")
+        print(f"❌ Query simple failed: {e}", file=out)
         return False
 
-def test_hackrx_run_simple():
+@register("verify_hackrx_run_simple", "Hackrx Run Simple")
+async def test_hackrx_run_simple(client, out):
     """Test the main hackrx/run-simple endpoint"""
-    print("\n🤖 Testing /hackrx/run-simple...")
+    print("🤖 Testing /hackrx/run-simple...", file=out)
     
     test_data = {
         "documents": "test_document.pdf",
@@ -93,40 +97,41 @@ def test_hackrx_run_simple():
     }
     
     try:
-        response = requests.post(
+        response = await client.post(
             f"{RENDER_URL}/hackrx/run-simple",
             json=test_data,
             headers={"Content-Type": "application/json"},
             timeout=60
         )
-        print(f"✅ Hackrx run simple: {response.status_code}")
+        print(f"✅ Hackrx run simple: {response.status_code}", file=out)
         if response.status_code == 200:
             result = response.json()
-            print(f"   Processed {len(result.get('data', []))} questions")
+            print(f"   Processed {len(result.get('data', []))} questions", file=out)
         elif response.status_code == 502:
-            print("❌ Hackrx run simple: 502 Bad Gateway - still timing out")
+            print("❌ Hackrx run simple: 502 Bad Gateway - still timing out", file=out)
             return False
         return True
-    except requests.exceptions.Timeout:
-        print("❌ Hackrx run simple: Timeout after 60 seconds")
+    except httpx.TimeoutException:
+        print("❌ Hackrx run simple: Timeout after 60 seconds", file=out)
         return False
     except Exception as e:
-        print(f"❌ Hackrx run simple failed: {e}")
+        print(f"❌ Hackrx run simple failed: {e}", file=out)
         return False
 
-def test_debug_pinecone():
+@register("verify_debug_pinecone", "Debug Pinecone")
+async def test_debug_pinecone(client, out):
     """Test debug endpoint to check embeddings"""
-    print("\n🧠 Testing /debug/pinecone...")
+    print("🧠 Testing /debug/pinecone...", file=out)
     
     try:
-        response = requests.get(f"{RENDER_URL}/debug/pinecone", timeout=10)
-        print(f"✅ Debug pinecone: {response.status_code}")
+        response = await client.get(f"{RENDER_URL}/debug/pinecone", timeout=10)
+        print(f"✅ Debug pinecone: {response.status_code}", file=out)
         if response.status_code == 200:
             result = response.json()
-            print(f"   Total vectors: {result.get('total_vectors', 0)}")
+            print(f"   Total vectors: {result.get('total_vectors', 0)}", file=out)
         return True
     except Exception as e:
-        print(f"❌ Debug pinecone failed: {e}")
+        print(f"❌ Debug pinecone failed: {e}", file=out)
         return False
 
 def main():
@@ -134,49 +139,16 @@ def main():
     print("🚀 Deployment Verification")
     print("=" * 50)
     
-    tests = [
-        ("Basic Endpoints", test_basic_endpoints),
-        ("Hackrx Test", test_hackrx_test),
-        ("Debug Pinecone", test_debug_pinecone),
-        ("Query Simple", test_query_simple),
-        ("Hackrx Run Simple", test_hackrx_run_simple),
-    ]
-    
-    results = {}
-    
-    for test_name, test_func in tests:
-        print(f"\n📋 {test_name}")
-        print("-" * 30)
-        
-        start_time = time.time()
-        success = test_func()
-        end_time = time.time()
-        
-        results[test_name] = {
-            "success": success,
-            "time": end_time - start_time
-        }
-        
-        if success:
-            print(f"✅ {test_name} PASSED ({end_time - start_time:.2f}s)")
-        else:
-            print(f"❌ {test_name} FAILED ({end_time - start_time:.2f}s)")
-    
-    # Summary
-    print("\n" + "=" * 50)
-    print("📊 VERIFICATION SUMMARY")
-    print("=" * 50)
-    
-    passed = sum(1 for result in results.values() if result["success"])
-    total = len(results)
-    
-    for test_name, result in results.items():
-        status = "✅ PASS" if result["success"] else "❌ FAIL"
-        print(f"{status} {test_name} ({result['time']:.2f}s)")
-    
-    print(f"\n🎯 {passed}/{total} tests passed")
+    # The checks are independent, so run them concurrently over the shared client
+    results = run_sync([
+        "verify_basic",
+        "verify_hackrx_test",
+        "verify_debug_pinecone",
+        "verify_query_simple",
+        "verify_hackrx_run_simple",
+    ])
     
-    if passed == total:
+    if render_report(results, "📊 VERIFICATION SUMMARY"):
         print("🎉 All tests passed! Your deployment is working correctly.")
         print("\n📋 Next Steps:")
         print("1. Upload a PDF file using /upload-fast")